@@ -1,5 +1,5 @@
 from . import manage
-from .database import Database
+from .database import Database, DatabaseRouter
 from .exception import SchemaException, ValidateException
 from .model import Model, id_to_many, id_to_one, model
 from .schema import (
@@ -29,6 +29,7 @@ from .schema import (
 
 __all__ = (
     "Database",
+    "DatabaseRouter",
     "SchemaException",
     "ValidateException",
     "Operation",
@@ -1,9 +1,15 @@
+from __future__ import annotations
+
 import enum
+import typing
 
 from databases import Database as _Database
 
 from . import exception
 
+if typing.TYPE_CHECKING:
+    from .schema import Operation
+
 
 class Database(_Database):
     class Type(enum.Enum):
@@ -18,6 +24,18 @@ class Database(_Database):
 
             return f"{qt}{content}{qt}"
 
+        @property
+        def max_bind_params(self) -> int:
+            """Bind parameters limit of one sql, 0 means no limit"""
+            if self == self.SQLITE:
+                import sqlite3  # optional extension module, only for SQLite users
+
+                return 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+            elif self == self.POSTGRES:
+                return 32767
+            # aiomysql renders parameters at client side
+            return 0
+
     SUPPORTED_BACKENDS = {
         "mysql": "danio.mysql:MySQLBackend",
         "sqlite": "danio.sqlite:SQLiteBackend",
@@ -31,3 +49,34 @@ class Database(_Database):
             if t.value in str(self._backend).lower():
                 return t
         raise exception.SchemaException(f"Can't determine {self._backend}'s type")
+
+
+class DatabaseRouter:
+    """Route model operations to databases, eg: reads to a replica"""
+
+    def __init__(
+        self,
+        default: Database,
+        routes: typing.Optional[typing.Mapping[Operation, Database]] = None,
+    ) -> None:
+        self.default = default
+        self.routes: typing.Dict[Operation, Database] = dict(routes or {})
+
+    @property
+    def databases(self) -> typing.List[Database]:
+        databases = [self.default]
+        for db in self.routes.values():
+            if all(db is not d for d in databases):
+                databases.append(db)
+        return databases
+
+    def get(self, operation: Operation) -> Database:
+        return self.routes.get(operation, self.default)
+
+    async def connect(self) -> None:
+        for db in self.databases:
+            await db.connect()
+
+    async def disconnect(self) -> None:
+        for db in self.databases:
+            await db.disconnect()
@@ -42,15 +42,11 @@ async def make_migration(
     # write to file
     sql = "\n".join(sqls)
     down_sql = "\n".join(down_sqls)
-    with open(
-        os.path.join(dir, f"{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}_up.sql"), "w"
-    ) as f:
+    now = datetime.now().strftime("%Y_%m_%d_%H_%M_%S")
+    with open(os.path.join(dir, f"{now}_up.sql"), "w") as f:
         f.write(sql)
         logging.info(f"New migration sql file: {f.name}")
-    with open(
-        os.path.join(dir, f"{datetime.now().strftime('%Y_%m_%d_%H_%M_%S')}_down.sql"),
-        "w",
-    ) as f:
+    with open(os.path.join(dir, f"{now}_down.sql"), "w") as f:
         f.write(down_sql)
         logging.info(f"New migration sql file: {f.name}")
 
@@ -62,20 +58,18 @@ async def write_model_hints(
 ):
     hints_flag = f"{'-' * 20}Danio Hints{'-' * 20}"
     # analyze
-    lines, no = inspect.getsourcelines(Model)
-    with open(inspect.getsourcefile(Model), "r") as file:  # type: ignore
-        all_lines = file.readlines()
+    source_file = inspect.getsourcefile(Model)
+    # one read of the module gives both the file and the class block
+    all_lines, lnum = inspect.findsource(Model)
+    lines, no = inspect.getblock(all_lines[lnum:]), lnum + 1
 
     start_index = 0
-    for i, l in enumerate(lines):
-        if l.strip().startswith("class "):
-            start_index = no + i
-            break
-
     old_start_index = 0
     old_end_index = 0
     for i, l in enumerate(lines):
-        if hints_flag in l:
+        if not start_index and l.lstrip().startswith("class "):
+            start_index = no + i
+        elif hints_flag in l:
             if not old_start_index:
                 old_start_index = no + i - 1
             else:
@@ -110,7 +104,7 @@ async def write_model_hints(
     if old_start_index and old_end_index:
         all_lines = all_lines[:old_start_index] + all_lines[old_end_index + 1 :]
     all_lines = all_lines[:start_index] + ths + all_lines[start_index:]
-    with open(inspect.getsourcefile(Model), "w") as file:  # type: ignore
+    with open(source_file, "w") as file:  # type: ignore
         file.writelines(all_lines)
 
 
@@ -3,18 +3,22 @@ Base ORM model with CRUD
 """
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import dataclasses
 import enum
 import logging
 import re
+import sys
 import typing
 import warnings
 from contextvars import ContextVar
 
+from databases.core import Transaction
 from databases.interfaces import Record
 
 from . import exception, schema
-from .database import Database
+from .database import Database, DatabaseRouter
 from .schema import (
     Field,
     Index,
@@ -24,24 +28,55 @@ from .schema import (
     Schema,
     SQLExpression,
 )
-from .utils import class_property
+from .utils import batched, class_property
 
 MODEL_TV = typing.TypeVar("MODEL_TV", bound="Model")
 SQLCHAIN_TV = typing.TypeVar("SQLCHAIN_TV", bound="SqlChain")
 
+SNAKE_CASE_PATTERN = re.compile(r"(?P<n>[A-Z])")
+# quoted field name in MySQL/SQLite table definition
+FIELD_NAME_PATTERN = re.compile(r"`([^ ,]*)`")
+# signal flags, set in Model._signals when the signal method is overridden
+AFTER_READ = 1
+BEFORE_CREATE = 1 << 1
+AFTER_CREATE = 1 << 2
+BEFORE_UPDATE = 1 << 3
+AFTER_UPDATE = 1 << 4
+BEFORE_SAVE = 1 << 5
+AFTER_SAVE = 1 << 6
+BEFORE_DELETE = 1 << 7
+AFTER_DELETE = 1 << 8
+VALIDATE = 1 << 9
+LOAD_RELATIONS = 1 << 10
+SIGNALS = {
+    AFTER_READ: "after_read",
+    BEFORE_CREATE: "before_create",
+    AFTER_CREATE: "after_create",
+    BEFORE_UPDATE: "before_update",
+    AFTER_UPDATE: "after_update",
+    BEFORE_SAVE: "before_save",
+    AFTER_SAVE: "after_save",
+    BEFORE_DELETE: "before_delete",
+    AFTER_DELETE: "after_delete",
+    VALIDATE: "validate",
+    LOAD_RELATIONS: "load_relations",
+}
+
 
 @typing.dataclass_transform()
 def model(cls: typing.Type[MODEL_TV]) -> typing.Type[MODEL_TV]:
     cls = dataclasses.dataclass(cls)
     cls.schema = cls.get_schema()
+    cls._dump_plan = tuple((f.name, f.model_name) for f in cls.schema.fields)
+    cls._field_names = tuple(f.name for f in dataclasses.fields(cls))
     return cls
 
 
 @model
 class Model:
-    DATABASE: typing.ClassVar[ContextVar[typing.Optional[Database]]] = ContextVar(
-        "database"
-    )
+    DATABASE: typing.ClassVar[
+        ContextVar[typing.Optional[typing.Union[Database, DatabaseRouter]]]
+    ] = ContextVar("database")
     schema: typing.ClassVar[Schema]
 
     ID: typing.ClassVar[Field]
@@ -59,6 +94,27 @@ class Model:
     _table_abstracted: typing.ClassVar[
         bool
     ] = True  # do not impact subclass, default false for every child class except defined as true
+    # max rows of one bulk operation sql, larger batches run in one transaction
+    _bulk_batch_size: typing.ClassVar[int] = 1000
+    # overridden signal flags, default signal methods do no IO and can be skipped
+    _signals: typing.ClassVar[int] = 0
+    # (name, model_name) of schema fields, for dumping all fields
+    _dump_plan: typing.ClassVar[typing.Tuple[typing.Tuple[str, str], ...]] = ()
+    # names of all dataclass fields
+    _field_names: typing.ClassVar[typing.Tuple[str, ...]] = ()
+    _cached_table_name: typing.ClassVar[str]
+    _loaders: typing.ClassVar[
+        typing.Dict[
+            typing.Tuple[str, ...], typing.Callable[[typing.Sequence], typing.Any]
+        ]
+    ]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._signals = 0
+        for flag, name in SIGNALS.items():
+            if getattr(cls, name) is not getattr(Model, name):
+                cls._signals |= flag
 
     @class_property
     @classmethod
@@ -132,7 +188,11 @@ class Model:
             if f.enum:
                 if isinstance(value, enum.Enum):
                     value = value.value
-                if value not in set((c.value for c in f.enum)):
+                try:
+                    valid = value in f.enum._value2member_map_
+                except TypeError:  # unhashable value
+                    valid = value in [c.value for c in f.enum]
+                if not valid:
                     raise exception.ValidateException(
                         f"{self.__class__.__name__}.{f.model_name} value: {value} not in choices: {f.enum}"
                     )
@@ -154,6 +214,8 @@ class Model:
         ignore_fields: typing.Iterable[Field] = (),
     ) -> typing.Dict[str, typing.Any]:
         """Dump model to dict with only database fields"""
+        if not fields and not ignore_fields:
+            return {n: getattr(self, mn) for n, mn in self._dump_plan}
         data = {}
         _ignore_fields = {f.name for f in ignore_fields}
         for f in fields or self.schema.fields:
@@ -173,13 +235,14 @@ class Model:
         database = (
             database if database else self.__class__.get_database(Operation.CREATE)
         )
+        pk = self.schema.primary_field
         data = self.dump(fields=fields, ignore_fields=ignore_fields)
-        if (
-            self.schema.primary_field.name in data
-            and not data[self.schema.primary_field.name]
-        ):
-            data.pop(self.schema.primary_field.name)
-        await self.before_create(validate=validate)
+        if pk.name in data and not data[pk.name]:
+            data.pop(pk.name)
+        if self._signals & (BEFORE_CREATE | BEFORE_SAVE | VALIDATE):
+            await self.before_create(validate=validate)
+        elif validate:
+            await self.validate()
 
         builder = schema.Insert(
             insert_data=[data],
@@ -188,8 +251,9 @@ class Model:
         last_id = (
             await database.execute(builder.to_sql(database.type), builder._vars)
         )[0]
-        setattr(self, self.schema.primary_field.model_name, last_id)
-        await self.after_create()
+        setattr(self, pk.model_name, last_id)
+        if self._signals & (AFTER_CREATE | AFTER_SAVE):
+            await self.after_create()
         return self
 
     async def update(
@@ -202,14 +266,32 @@ class Model:
         """
         For PostgreSQL/SQLite, always return True
         """
-        assert self.primary
-        await self.before_update(validate=validate)
+        pk = self.schema.primary_field
+        primary = getattr(self, pk.model_name)
+        assert primary
+        if self._signals & (BEFORE_UPDATE | BEFORE_SAVE | VALIDATE):
+            await self.before_update(validate=validate)
+        elif validate:
+            await self.validate()
         data = self.dump(fields=fields, ignore_fields=ignore_fields)
-        rowcount = await self.__class__.where(
-            self.schema.primary_field == self.primary,
-            database=database,
-        ).update(**data)
-        await self.after_update()
+        if any(isinstance(v, schema.SQLMarker) for v in data.values()):
+            rowcount = await self.__class__.where(
+                pk == primary,
+                database=database,
+            ).update(**data)
+        else:
+            database = (
+                database if database else self.__class__.get_database(Operation.UPDATE)
+            )
+            builder = schema.Crud(schema=self.__class__.schema)
+            rowcount = (
+                await database.execute(
+                    builder.to_primary_update_sql(data, primary, type=database.type),
+                    builder._vars,
+                )
+            )[1]
+        if self._signals & (AFTER_UPDATE | AFTER_SAVE):
+            await self.after_update()
         return rowcount > 0
 
     async def save(
@@ -240,11 +322,23 @@ class Model:
         self,
         database: typing.Optional[Database] = None,
     ) -> bool:
-        await self.before_delete()
-        row_count = await self.__class__.where(
-            self.schema.primary_field == self.primary, database=database
-        ).delete()
-        await self.after_delete()
+        if self._signals & BEFORE_DELETE:
+            await self.before_delete()
+        database = (
+            database if database else self.__class__.get_database(Operation.DELETE)
+        )
+        pk = self.schema.primary_field
+        builder = schema.Crud(schema=self.__class__.schema)
+        row_count = (
+            await database.execute(
+                builder.to_primary_delete_sql(
+                    getattr(self, pk.model_name), type=database.type
+                ),
+                builder._vars,
+            )
+        )[1]
+        if self._signals & AFTER_DELETE:
+            await self.after_delete()
         return row_count > 0
 
     async def refetch(
@@ -252,11 +346,15 @@ class Model:
         database: typing.Optional[Database] = None,
         fields: typing.Iterable[Field] = tuple(),
     ) -> MODEL_TV:
+        pk = self.schema.primary_field
+        fields = tuple(fields)
         new = await self.__class__.where(
-            self.schema.primary_field == self.primary, database=database
+            pk == getattr(self, pk.model_name), database=database
         ).fetch_one(fields=fields)
-        for f in dataclasses.fields(self):
-            setattr(self, f.name, getattr(new, f.name))
+        # only fetched fields are refreshed when fields are given
+        names = tuple(f.model_name for f in fields) if fields else self._field_names
+        for name in names:
+            setattr(self, name, getattr(new, name))
         return self
 
     async def get_or_create(
@@ -325,17 +423,23 @@ class Model:
             )
             if not created:
                 setattr(self, self.schema.primary_field.model_name, ins.primary)
-                updated = await self.update(validate=validate, fields=update_fields)
+                updated = await self.update(
+                    database=database, validate=validate, fields=update_fields
+                )
                 ins = self
         return ins, created, updated
 
     @classmethod
     def get_table_name(cls) -> str:
-        prefix = cls._table_name_prefix or cls._table_prefix
-        if cls._table_name_snake_case:
-            return prefix + re.sub(r"(?P<n>[A-Z])", r"_\g<n>", cls.__name__).lower()[1:]
-        else:
-            return prefix + cls.__name__.lower()
+        # cache on the class itself, subclasses have their own names
+        if "_cached_table_name" not in cls.__dict__:
+            prefix = cls._table_name_prefix or cls._table_prefix
+            if cls._table_name_snake_case:
+                name = SNAKE_CASE_PATTERN.sub(r"_\g<n>", cls.__name__).lower()[1:]
+            else:
+                name = cls.__name__.lower()
+            cls._cached_table_name = prefix + name
+        return cls.__dict__["_cached_table_name"]
 
     @classmethod
     def get_table_index_keys(cls) -> typing.Tuple[typing.Tuple[typing.Any, ...], ...]:
@@ -348,9 +452,11 @@ class Model:
     @classmethod
     def get_database(cls, operation: Operation, *args, **kwargs) -> Database:
         """Get database instance, route database by operation"""
-        db = cls.DATABASE.get()
+        db = cls.DATABASE.get(None)
         if not db:
             raise RuntimeError("No database provide")
+        if isinstance(db, DatabaseRouter):
+            return db.get(operation)
         return db
 
     @classmethod
@@ -358,14 +464,72 @@ class Model:
         cls: typing.Type[MODEL_TV], rows: typing.List[typing.Mapping]
     ) -> typing.List[MODEL_TV]:
         """Load DB data to model"""
-        instances = []
-        for row in rows:
-            data = {}
+        return [cls._get_loader(tuple(row.keys()))(tuple(row.values())) for row in rows]
+
+    @classmethod
+    def load_records(
+        cls: typing.Type[MODEL_TV], records: typing.Sequence[Record]
+    ) -> typing.List[MODEL_TV]:
+        """Load DB records to model, reading columns by position"""
+        if not records:
+            return []
+        loader = cls._get_loader(tuple(records[0]._mapping.keys()))
+        return [loader(r) for r in records]
+
+    @classmethod
+    def _get_loader(
+        cls: typing.Type[MODEL_TV], columns: typing.Tuple[str, ...]
+    ) -> typing.Callable[[typing.Sequence], MODEL_TV]:
+        """Generate a function which loads one record with these columns to model"""
+        if "_loaders" not in cls.__dict__:
+            cls._loaders = {}
+        if columns not in cls._loaders:
+            indexes = {c: i for i, c in enumerate(columns)}
+            namespace: typing.Dict[str, typing.Any] = {
+                "cls": cls,
+                "new": object.__new__,
+            }
+            values = {}
             for f in cls.schema.fields:
-                if f.name in row:
-                    data[f.model_name] = f.to_python(row[f.name])
-            instances.append(cls(**data))
-        return instances
+                if f.name not in indexes:
+                    continue
+                value = f"r[{indexes[f.name]}]"
+                if f.enum or type(f).to_python is not Field.to_python:
+                    namespace[f"to_python_{f.model_name}"] = f.to_python
+                    value = f"to_python_{f.model_name}({value})"
+                values[f.model_name] = value
+            source = "def load(r):\n    return cls({})\n".format(
+                ", ".join(f"{k}={v}" for k, v in values.items())
+            )
+            if (
+                cls.__post_init__ is Model.__post_init__
+                and cls.after_init is Model.after_init
+            ):
+                # DB never returns Field instances, skip __init__ and after_init
+                for df in dataclasses.fields(cls):
+                    if df.name in values:
+                        continue
+                    elif df.default_factory is not dataclasses.MISSING:
+                        namespace[f"factory_{df.name}"] = df.default_factory
+                        values[df.name] = f"factory_{df.name}()"
+                    elif df.default is not dataclasses.MISSING:
+                        default = df.default
+                        if isinstance(default, Field):
+                            default = default.default_value
+                        namespace[f"default_{df.name}"] = default
+                        values[df.name] = f"default_{df.name}"
+                    elif df.init:
+                        break  # let __init__ raise the missing argument error
+                else:
+                    source = (
+                        "def load(r):\n"
+                        "    ins = new(cls)\n"
+                        "    ins.__dict__.update({})\n"
+                        "    return ins\n"
+                    ).format(", ".join(f"{k}={v}" for k, v in values.items()))
+            exec(compile(source, f"<{cls.__name__} loader>", "exec"), namespace)
+            cls._loaders[columns] = namespace["load"]
+        return cls._loaders[columns]
 
     @classmethod
     def where(
@@ -415,62 +579,82 @@ class Model:
     @classmethod
     async def bulk_create(
         cls: typing.Type[MODEL_TV],
-        instances: typing.Sequence[MODEL_TV],
+        instances: typing.Iterable[MODEL_TV],
         fields: typing.Iterable[Field] = (),
         database: typing.Optional[Database] = None,
         validate: bool = True,
     ) -> typing.Sequence[MODEL_TV]:
-        assert cls.schema.primary_field
+        instances = cls._materialize(instances)
+        pk = cls.schema.primary_field
+        assert pk
+        pk_name = pk.name
+        pk_mn = pk.model_name
         if not database:
             database = cls.get_database(Operation.CREATE)
-        if (
-            database.type != database.type.POSTGRES
-            and not cls.schema.primary_field.auto_increment
-        ):
+        if database.type != database.type.POSTGRES and not pk.auto_increment:
             raise exception.OperationException(
                 f"{cls}'s primary_field must be auto incremented!"
             )
-        if (
-            database.type == database.type.POSTGRES
-            and "serial" not in cls.schema.primary_field.type
-        ):
+        if database.type == database.type.POSTGRES and "serial" not in pk.type:
             raise exception.OperationException(
                 f"{cls}'s primary_field must be auto incremented!"
             )
 
-        for ins in instances:
-            await ins.before_create(validate=validate)
-        data = [ins.dump(fields=fields) for ins in instances]
-        if database.type != Database.Type.MYSQL:
-            for d in data:
+        if cls._signals & (BEFORE_CREATE | BEFORE_SAVE | VALIDATE):
+            await asyncio.gather(
+                *(ins.before_create(validate=validate) for ins in instances)
+            )
+        elif validate:
+            for ins in instances:
+                await ins.validate()
+        batch_size = cls._batch_size(database, len(cls.schema.fields))
+        async with cls._batch_transaction(database, len(instances), batch_size):
+            for chunk in batched(instances, batch_size):
+                data = []
+                missing = []
+                for ins in chunk:
+                    d = ins.dump(fields=fields)
+                    if not getattr(ins, pk_mn):
+                        missing.append(ins)
+                        if database.type != Database.Type.MYSQL:
+                            d.pop(pk_name, None)
+                    data.append(d)
                 if (
-                    cls.schema.primary_field.name in d
-                    and not d[cls.schema.primary_field.name]
+                    database.type != Database.Type.MYSQL
+                    and len({len(d) for d in data}) != 1
                 ):
-                    d.pop(cls.schema.primary_field.name)
-            if len({len(d) for d in data}) != 1:
-                raise exception.OperationException(
-                    "For SQLite or PostgreSQL, all instances either have primary key value or none"
-                )
-
-        builder = schema.Insert(insert_data=data, schema=cls.schema)
-        next_ins_id = (
-            await database.execute(builder.to_sql(database.type), builder._vars)
-        )[0]
-
-        if database.type == database.type.MYSQL:
-            for ins in instances:
-                if not ins.primary:
-                    setattr(ins, cls.schema.primary_field.model_name, next_ins_id)
-                next_ins_id = ins.primary + 1
-        else:
-            for ins in reversed(instances):
-                if not ins.primary:
-                    setattr(ins, cls.schema.primary_field.model_name, next_ins_id)
-                next_ins_id = ins.primary - 1
+                    raise exception.OperationException(
+                        "For SQLite or PostgreSQL, all instances either have primary key value or none"
+                    )
 
-        for ins in instances:
-            await ins.after_create()
+                builder = schema.Insert(insert_data=data, schema=cls.schema)
+                last_id = (
+                    await database.execute(builder.to_sql(database.type), builder._vars)
+                )[0]
+
+                if len(missing) == len(chunk):
+                    # MySQL returns the first inserted id, others the last one
+                    first_id = (
+                        last_id
+                        if database.type == Database.Type.MYSQL
+                        else last_id - len(chunk) + 1
+                    )
+                    for i, ins in enumerate(chunk):
+                        setattr(ins, pk_mn, first_id + i)
+                elif missing and database.type == Database.Type.MYSQL:
+                    # auto increment continues from explicit primary keys
+                    for ins in chunk:
+                        if not getattr(ins, pk_mn):
+                            setattr(ins, pk_mn, last_id)
+                        last_id = getattr(ins, pk_mn) + 1
+                elif missing:
+                    for ins in reversed(chunk):
+                        if not getattr(ins, pk_mn):
+                            setattr(ins, pk_mn, last_id)
+                        last_id = getattr(ins, pk_mn) - 1
+
+        if cls._signals & (AFTER_CREATE | AFTER_SAVE):
+            await asyncio.gather(*(ins.after_create() for ins in instances))
         return instances
 
     @classmethod
@@ -480,24 +664,38 @@ class Model:
         fields: typing.Iterable[Field] = (),
         database: typing.Optional[Database] = None,
         validate: bool = True,
-    ) -> typing.Iterable[MODEL_TV]:
-        assert cls.schema.primary_field
+    ) -> typing.Sequence[MODEL_TV]:
+        instances = cls._materialize(instances)
+        pk = cls.schema.primary_field
+        assert pk
+        pk_name = pk.name
+        pk_mn = pk.model_name
 
         database = database if database else cls.get_database(Operation.UPDATE)
-        for ins in instances:
-            await ins.before_update(validate=validate)
-
-        data = []
-        for ins in instances:
-            assert ins.primary, "Need primary"
-            data.append(ins.dump(fields=fields))
-            data[-1][cls.schema.primary_field.name] = ins.primary
-
-        builder = schema.CaseUpdate(data=data, schema=cls.schema)
-        await database.execute(builder.to_sql(database.type), builder._vars)
-
-        for ins in instances:
-            await ins.after_update()
+        if cls._signals & (BEFORE_UPDATE | BEFORE_SAVE | VALIDATE):
+            await asyncio.gather(
+                *(ins.before_update(validate=validate) for ins in instances)
+            )
+        elif validate:
+            for ins in instances:
+                await ins.validate()
+
+        # a value for every field and the primary key
+        batch_size = cls._batch_size(database, len(cls.schema.fields) + 1)
+        async with cls._batch_transaction(database, len(instances), batch_size):
+            for chunk in batched(instances, batch_size):
+                data = []
+                for ins in chunk:
+                    primary = getattr(ins, pk_mn)
+                    assert primary, "Need primary"
+                    data.append(ins.dump(fields=fields))
+                    data[-1][pk_name] = primary
+
+                builder = schema.CaseUpdate(data=data, schema=cls.schema)
+                await database.execute(builder.to_sql(database.type), builder._vars)
+
+        if cls._signals & (AFTER_UPDATE | AFTER_SAVE):
+            await asyncio.gather(*(ins.after_update() for ins in instances))
         return instances
 
     @classmethod
@@ -506,16 +704,57 @@ class Model:
         instances: typing.Iterable[MODEL_TV],
         database: typing.Optional[Database] = None,
     ) -> int:
-        for ins in instances:
-            await ins.before_delete()
-        row_count = await cls.where(
-            cls.schema.primary_field.contains(tuple(ins.primary for ins in instances)),
-            database=database,
-        ).delete()
-        for ins in instances:
-            await ins.after_delete()
+        instances = cls._materialize(instances)
+        database = database if database else cls.get_database(Operation.DELETE)
+        if cls._signals & BEFORE_DELETE:
+            await asyncio.gather(*(ins.before_delete() for ins in instances))
+        pk = cls.schema.primary_field
+        pk_mn = pk.model_name
+        primaries = [getattr(ins, pk_mn) for ins in instances]
+        row_count = 0
+        batch_size = cls._batch_size(database, 1)
+        async with cls._batch_transaction(database, len(primaries), batch_size):
+            for batch in batched(primaries, batch_size):
+                row_count += await cls.where(
+                    pk.contains(batch), database=database
+                ).delete()
+        if cls._signals & AFTER_DELETE:
+            await asyncio.gather(*(ins.after_delete() for ins in instances))
         return row_count
 
+    @classmethod
+    def _after_read_needed(cls) -> bool:
+        """Default after_read only loads auto relations"""
+        return bool(cls._signals & (AFTER_READ | LOAD_RELATIONS)) or any(
+            f.auto for f in cls.schema.relation_fields
+        )
+
+    @staticmethod
+    def _materialize(
+        instances: typing.Iterable[MODEL_TV],
+    ) -> typing.Sequence[MODEL_TV]:
+        """Instances are iterated more than once by bulk operations"""
+        if isinstance(instances, (list, tuple)):
+            return instances
+        return list(instances)
+
+    @classmethod
+    def _batch_size(cls, database: Database, params_per_row: int) -> int:
+        """Rows of one bulk sql, limited by the database bind parameters limit"""
+        max_params = database.type.max_bind_params
+        if max_params:
+            return max(1, min(cls._bulk_batch_size, max_params // params_per_row))
+        return cls._bulk_batch_size
+
+    @staticmethod
+    def _batch_transaction(
+        database: Database, size: int, batch_size: int
+    ) -> typing.Union[Transaction, typing.AsyncContextManager]:
+        """Keep a bulk operation atomic when it is split to many sqls"""
+        if size > batch_size:
+            return database.transaction()
+        return contextlib.nullcontext()
+
     # deprecation
     @classmethod
     async def count(cls, *args, **kwargs):
@@ -537,6 +776,7 @@ class Model:
         schema = Schema(name=cls.table_name)
         schema.abstracted = cls.table_abstracted
         # fields
+        hints = typing.get_type_hints(cls, include_extras=True)
         for f in dataclasses.fields(cls):
             if isinstance(f.default, Field):  # from dataclass default
                 f.default.model_name = f.name
@@ -544,9 +784,7 @@ class Model:
                     f.default.name = f.name
                     f.default.__post_init__()
                 schema.fields.append(f.default)
-            if hint := typing.get_type_hints(cls, include_extras=True).get(
-                f.name
-            ):  # from Annotated
+            if hint := hints.get(f.name):  # from Annotated
                 for meta in getattr(hint, "__metadata__", ()):
                     if type(meta) is type and issubclass(meta, Field):
                         meta = meta()
@@ -564,6 +802,9 @@ class Model:
                         schema.relation_fields.append(meta)
                         setattr(cls, f.name, meta)
                         setattr(cls, f.name.upper(), meta)
+        for field in schema.fields:
+            field.name = sys.intern(field.name)
+            field.model_name = sys.intern(field.model_name)
         fields = {f.model_name: f for f in schema.fields}
         # index
         for i, index_keys in enumerate((cls.table_index_keys, cls.table_unique_keys)):
@@ -579,31 +820,52 @@ class Model:
                             raise exception.SchemaException(
                                 f"Index: {keys} not supported"
                             )
-                    schema.indexes.append(Index(fields=_fields, unique=i == 1))
+                    schema.indexes.append(
+                        Index(
+                            fields=_fields,
+                            unique=i == 1,
+                            name=Index.get_name(schema.name, _fields, i == 1),
+                        )
+                    )
         return schema
 
     @classmethod
     async def get_db_schema(cls, database: Database) -> typing.Optional[Schema]:
         schema = Schema(name=cls.table_name if cls else "table")
         model_names = {f.name: f.model_name for f in cls.schema.fields} if cls else {}
+        fields: typing.Dict[str, Field] = {}  # schema fields by name
         if database.type == database.type.MYSQL:
-            field_name_pattern = re.compile(r"`([^ ,]*)`")
             try:
                 for line in (
                     await database.fetch_all(f"SHOW CREATE TABLE `{cls.table_name}`")
                 )[0][1].split("\n")[1:-1]:
-                    if "PRIMARY KEY" in line:
-                        db_name = field_name_pattern.findall(line)[0]
-                        for f in schema.fields:
-                            if db_name == f.name:
-                                f.primary = True
-                                break
+                    # dispatch by the leading token, comments may contain keywords
+                    head = line.lstrip()[:11]
+                    if head.startswith("`"):
+                        match = FIELD_NAME_PATTERN.search(line)
+                        assert match
+                        db_name = match.group(1)
+                        name = model_names.get(db_name, "")
+                        field_type = line.split("`")[-1].split(" ")[1]
+                        field_cls = Schema.detect_field_type(database, field_type)
+                        fields[db_name] = field_cls(
+                            name=db_name,
+                            type=field_type,
+                            model_name=name,
+                            auto_increment="AUTO_INCREMENT" in line,
+                            not_null="NOT NULL" in line,
+                        )
+                        schema.fields.append(fields[db_name])
+                    elif head == "PRIMARY KEY":
+                        match = FIELD_NAME_PATTERN.search(line)
+                        assert match
+                        db_name = match.group(1)
+                        if db_name in fields:
+                            fields[db_name].primary = True
                     elif "FOREIGN KEY" in line:
                         logging.warning("FOREIGN KEY not support!")
                     elif "KEY" in line:
-                        fields = {f.name: f for f in schema.fields}
-                        index_fields = []
-                        _names = field_name_pattern.findall(line)
+                        _names = FIELD_NAME_PATTERN.findall(line)
                         index_name = _names[0]
                         index_fields = [fields[n] for n in _names[1:]]
                         schema.indexes.append(
@@ -613,53 +875,33 @@ class Model:
                                 name=index_name,
                             )
                         )
-                    else:
-                        db_name = field_name_pattern.findall(line)[0]
-                        name = model_names.get(db_name, "")
-                        field_type = line.split("`")[-1].split(" ")[1]
-                        schema.fields.append(
-                            Schema.detect_field_type(database, field_type)(
-                                name=db_name,
-                                type=field_type,
-                                model_name=name,
-                                auto_increment="AUTO_INCREMENT" in line,
-                                not_null="NOT NULL" in line,
-                            )
-                        )
             except Exception as e:
                 if "doesn't exist" in str(e):
                     return None
                 raise e
         elif database.type == database.type.SQLITE:
-            field_name_pattern = re.compile(r"`([^ ,]*)`")
             for r in await database.fetch_all(
                 f"SELECT * FROM sqlite_schema WHERE tbl_name = '{cls.table_name}';"
             ):
                 if r[0] == "table":
                     for line in r[4].split("\n")[1:]:
-                        names = field_name_pattern.findall(line)
-                        if names:
-                            db_name = names[0]
+                        # only the leading column name is needed, no full scan
+                        match = FIELD_NAME_PATTERN.search(line)
+                        if match:
+                            db_name = match.group(1)
                             name = model_names.get(db_name, "")
-                            primary = False
-                            if "PRIMARY" in line:
-                                primary = True
-                            auto_increment = False
-                            if "AUTOINCREMENT" in line:
-                                auto_increment = True
                             field_type = line.split("`")[-1].split(" ")[1]
-                            schema.fields.append(
-                                Schema.detect_field_type(database, field_type)(
-                                    name=db_name,
-                                    type=field_type,
-                                    model_name=name,
-                                    primary=primary,
-                                    auto_increment=auto_increment,
-                                )
+                            field_cls = Schema.detect_field_type(database, field_type)
+                            fields[db_name] = field_cls(
+                                name=db_name,
+                                type=field_type,
+                                model_name=name,
+                                primary="PRIMARY" in line,
+                                auto_increment="AUTOINCREMENT" in line,
                             )
+                            schema.fields.append(fields[db_name])
                 elif r[0] == "index":
-                    fields = {f.name: f for f in schema.fields}
-                    _names = field_name_pattern.findall(r[4])
+                    _names = FIELD_NAME_PATTERN.findall(r[4])
                     index_fields = [fields[n] for n in _names[2:]]
                     schema.indexes.append(
                         Index(
@@ -672,7 +914,7 @@ class Model:
             for r in await database.fetch_all(
                 f"SELECT * FROM information_schema.columns WHERE table_name = '{cls.table_name}';"
             ):
-                d = dict(r)
+                d = r._mapping
                 field_type = d["data_type"]
                 if field_type == "character varying":
                     field_type = f"varchar({d['character_maximum_length']})"
@@ -680,18 +922,17 @@ class Model:
                     field_type = f"char({d['character_maximum_length']})"
                 else:
                     field_type = field_type
-                schema.fields.append(
-                    Schema.detect_field_type(database, field_type)(
-                        name=d["column_name"],
-                        model_name=model_names.get(d["column_name"], ""),
-                        type=field_type,
-                    )
+                field_cls = Schema.detect_field_type(database, field_type)
+                fields[d["column_name"]] = field_cls(
+                    name=d["column_name"],
+                    model_name=model_names.get(d["column_name"], ""),
+                    type=field_type,
                 )
+                schema.fields.append(fields[d["column_name"]])
             for r in await database.fetch_all(
                 f"SELECT indexname, indexdef FROM pg_indexes WHERE tablename = '{cls.table_name}';"
             ):
-                d = dict(r)
-                fields = {f.name: f for f in schema.fields}
+                d = r._mapping
                 _names = d["indexdef"].split("(")[-1].split(")")[0].split(", ")
                 index_fields = [fields[n] for n in _names]
                 if d["indexname"].endswith("_pkey"):
@@ -724,24 +965,56 @@ class SqlChain(schema.Crud, typing.Generic[MODEL_TV]):
             self.database if self.database else self.model.get_database(Operation.READ)
         )
 
-        instances = self.model.load(
-            [
-                dict(r)
-                for r in await self.database.fetch_all(
-                    self.to_select_sql(
-                        type=self.database.type,
-                        fields=fields,
-                        ignore_fields=ignore_fields,
-                    ),
-                    self._vars,
-                )
-            ]
+        instances = self.model.load_records(
+            await self.database.fetch_all(
+                self.to_select_sql(
+                    type=self.database.type,
+                    fields=fields,
+                    ignore_fields=ignore_fields,
+                ),
+                self._vars,
+            )
         )
-        for ins in instances:
-            await ins.after_read()
+        if instances and self.model._after_read_needed():
+            await asyncio.gather(*(ins.after_read() for ins in instances))
 
         return instances
 
+    async def fetch_all_with_count(
+        self,
+        fields: typing.Iterable[Field] = tuple(),
+        ignore_fields: typing.Iterable[Field] = tuple(),
+    ) -> typing.Tuple[typing.List[MODEL_TV], int]:
+        """Fetch rows and the total count ignoring limit/offset in one query"""
+        assert self.model
+        self.database = (
+            self.database if self.database else self.model.get_database(Operation.READ)
+        )
+
+        records = await self.database.fetch_all(
+            self.to_select_sql(
+                type=self.database.type,
+                fields=fields,
+                ignore_fields=ignore_fields,
+                with_total=True,
+            ),
+            self._vars,
+        )
+        if records:
+            total = records[0][-1]
+        elif self._offset:
+            # no row to carry the total when offset is out of range
+            total = await dataclasses.replace(
+                self, _vars={}, _var_index=schema.SQLMarker.ID()
+            ).fetch_count()
+        else:
+            total = 0
+        instances = self.model.load_records(records)
+        if instances and self.model._after_read_needed():
+            await asyncio.gather(*(ins.after_read() for ins in instances))
+
+        return instances, total
+
     async def fetch_one(
         self,
         fields: typing.Iterable[Field] = tuple(),
@@ -759,8 +1032,9 @@ class SqlChain(schema.Crud, typing.Generic[MODEL_TV]):
             self._vars,
         )
         if data:
-            ins = self.model.load([dict(data)])[0]
-            await ins.after_read()
+            ins = self.model.load_records([data])[0]
+            if self.model._after_read_needed():
+                await ins.after_read()
             return ins
         else:
             return None
@@ -7,17 +7,28 @@ from . import exception
 
 
 class MySQLConnection(mysql.MySQLConnection):
+    # reused by execute until the connection is released
+    _cursor: typing.Optional[aiomysql.Cursor] = None
+
+    async def release(self) -> None:
+        if self._cursor is not None:
+            await self._cursor.close()
+            self._cursor = None
+        await super().release()
+
     async def execute(self, query: mysql.ClauseElement) -> typing.Any:
         try:
             assert self._connection is not None, "Connection is not acquired"
             query, args, context = self._compile(query)
-            cursor = await self._connection.cursor()
-            try:
-                await cursor.execute(query, args)
-                return (cursor.lastrowid, cursor.rowcount)
-            finally:
-                await cursor.close()
+            if self._cursor is None:
+                self._cursor = await self._connection.cursor()
+            await self._cursor.execute(query, args)
+            return (self._cursor.lastrowid, self._cursor.rowcount)
         except Exception as e:
+            # do not reuse a cursor left in an unknown state
+            if self._cursor is not None:
+                cursor, self._cursor = self._cursor, None
+                await cursor.close()
             if isinstance(e, aiomysql.IntegrityError):
                 raise exception.IntegrityError(str(e)) from e
             else:
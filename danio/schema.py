@@ -7,23 +7,31 @@ import decimal
 import enum
 import itertools
 import json
-import random
+import operator
 import typing
+import zlib
 from collections import defaultdict
 from datetime import datetime, timedelta
-from functools import reduce
+from functools import lru_cache, reduce
 
 import sqlalchemy
 
 from . import exception, utils
 from .database import Database
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
 T = typing.TypeVar("T")
 SCHEMA_TV = typing.TypeVar("SCHEMA_TV", bound="Schema")
 MIGRATION_TV = typing.TypeVar("MIGRATION_TV", bound="Migration")
 MARKER_TV = typing.TypeVar("MARKER_TV", bound="SQLMarker")
 CRUD_TV = typing.TypeVar("CRUD_TV", bound="Crud")
 CASE_TV = typing.TypeVar("CASE_TV", bound="SQLCase")
+# suffix of unnamed indexes, unique within the process
+INDEX_SEQUENCE = itertools.count(1)
 
 
 def join(*contents, delimiter=" ") -> str:
@@ -38,6 +46,29 @@ def V(value: typing.Any) -> str:
     )
 
 
+def json_loads(value: str) -> typing.Any:
+    if orjson:
+        try:
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:  # e.g. NaN, let json decide
+            pass
+    return json.loads(value)
+
+
+@lru_cache(maxsize=None)
+def comparable_type(type: str) -> str:
+    """Normalize a column type so model and database types can be compared"""
+    type = type.lower()
+    # postgresql serial field
+    type = type.replace("serial", "int")
+    # integer
+    type = type.replace("integer", "int")
+    # int int(10)...
+    if "int" in type:
+        type = type.split("(")[0]
+    return type
+
+
 @dataclasses.dataclass
 class Field:
     class FieldDefault:
@@ -76,6 +107,9 @@ class Field:
         if self.enum and not isinstance(self.default, self.enum):
             self.default = list(self.enum)[0]
 
+    # identity hash, python3.11 dataclasses reject unhashable defaults from `field`
+    __hash__ = object.__hash__
+
     def __eq__(self, other: typing.Any) -> SQLExpression:  # type: ignore[override]
         return SQLExpression(field=self, values=[(SQLExpression.Operator.EQ, other)])
 
@@ -260,7 +294,7 @@ class JsonField(CharField):
 
     def to_python(self, value: typing.Any) -> typing.Any:
         if value and isinstance(value, str):
-            return json.loads(value)
+            return json_loads(value)
         else:
             return super().to_python(value)
 
@@ -303,7 +337,14 @@ class Index:
 
     def __post_init__(self):
         if not self.name:
-            self.name = f"{'_'.join(f.name for f in self.fields)[:15]}_{random.randint(1, 10000)}{'_uiq' if self.unique else '_idx'}"
+            self.name = f"{'_'.join(f.name for f in self.fields)[:15]}_{next(INDEX_SEQUENCE)}{'_uiq' if self.unique else '_idx'}"
+
+    @staticmethod
+    def get_name(table: str, fields: typing.Sequence[Field], unique: bool) -> str:
+        """Stable name, same table and fields always get the same name"""
+        names = "_".join(f.name for f in fields)
+        suffix = zlib.crc32(f"{table}.{names}".encode()) % 10000 + 1
+        return f"{names[:15]}_{suffix}{'_uiq' if unique else '_idx'}"
 
     def to_sql(self, type: Database.Type = Database.Type.MYSQL) -> str:
         if type == type.MYSQL:
@@ -317,6 +358,33 @@ class Index:
             return ""
 
 
+@lru_cache(maxsize=None)
+def field_type_class(field_type: str) -> typing.Type[Field]:
+    """Detect field class by lower case database column type"""
+    if "json" in field_type:
+        return JsonField
+    elif "int" in field_type or "serial" in field_type:
+        return IntField
+    elif "boolean" in field_type:
+        return BoolField
+    elif utils.contains(field_type, ("float", "real", "double"), False):
+        return FloatField
+    elif utils.contains(field_type, ("numeric", "decimal", "money"), False):
+        return DecimalField  # TODO: money
+    elif utils.contains(field_type, ("binary", "blob", "bytea", "bit"), False):
+        return BytesField
+    elif "datetime" in field_type or "timestamp" in field_type:
+        return DateTimeField
+    elif "date" in field_type:
+        return DateField
+    elif "time" in field_type:
+        return TimeField
+    elif utils.contains(field_type, ("char", "text", "character", "clob"), False):
+        return CharField
+    else:
+        return Field
+
+
 class RelationField(typing.Generic[T]):
     def __init__(
         self, fetcher: typing.Callable[[T], typing.Any], auto: bool = False
@@ -344,6 +412,10 @@ class Schema:
         default_factory=list
     )
     abstracted: bool = False
+    # rendered SQL fragments which only depend on schema and database type
+    _sql_cache: typing.Dict[typing.Tuple, str] = dataclasses.field(
+        default_factory=dict, repr=False
+    )
 
     @utils.cached_property
     def primary_field(self) -> Field:
@@ -359,24 +431,12 @@ class Schema:
         # fields
         self_fields = {f.name: f for f in self.fields}
         other_fields = {f.name: f for f in other.fields}
-        change_type_fields = []
-        for f in self.fields:
-            if f.name in other_fields:
-                type1 = f.type.lower()
-                type2 = other_fields[f.name].type.lower()
-                # postgresql serial field
-                type1 = type1.replace("serial", "int")
-                type2 = type2.replace("serial", "int")
-                # integer
-                type1 = type1.replace("integer", "int")
-                type2 = type2.replace("integer", "int")
-                # int int(10)...
-                if "int" in type1:
-                    type1 = type1.split("(")[0]
-                if "int" in type2:
-                    type2 = type2.split("(")[0]
-                if type1 != type2:
-                    change_type_fields.append(f)
+        change_type_fields = [
+            f
+            for f in self.fields
+            if f.name in other_fields
+            and comparable_type(f.type) != comparable_type(other_fields[f.name].type)
+        ]
         # indexes
         self_indexes = {
             (i.unique, tuple(f.name for f in i.fields)): i for i in self.indexes
@@ -400,8 +460,19 @@ class Schema:
         )
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         assert isinstance(other, Schema)
-        return not bool((self - other).to_sql())
+        migration = self - other
+        return self.name == other.name and not any(
+            (
+                migration.add_fields,
+                migration.drop_fields,
+                migration.change_type_fields,
+                migration.add_indexes,
+                migration.drop_indexes,
+            )
+        )
 
     def sync_index_name(self: SCHEMA_TV, other: SCHEMA_TV) -> SCHEMA_TV:
         if self != other:
@@ -417,33 +488,23 @@ class Schema:
     def to_sql(self, type: Database.Type = Database.Type.MYSQL) -> str:
         assert self.primary_field
 
+        table = type.quote(self.name)
+        parts = [v.to_sql(type=type) for v in self.fields]
         if type == type.MYSQL:
-            keys = [f"PRIMARY KEY ({type.quote(self.primary_field.name)})"]
+            parts.append(f"PRIMARY KEY ({type.quote(self.primary_field.name)})")
+            parts.extend(index.to_sql(type=type) for index in self.indexes)
             postfix = (
                 " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;"
             )
-        elif type == type.POSTGRES:
-            keys = []
-            postfix = ";"
         else:
-            keys = []
             postfix = ";"
 
-        if type == type.MYSQL:
-            keys.extend([index.to_sql(type=type) for index in self.indexes])
-
-        sql = (
-            f"CREATE TABLE {type.quote(self.name)} (\n"
-            + ",\n".join(
-                itertools.chain((v.to_sql(type=type) for v in self.fields), keys)
-            )
-            + f"\n){postfix}"
-        )
+        sql = f"CREATE TABLE {table} (\n" + ",\n".join(parts) + f"\n){postfix}"
         if type != Database.Type.MYSQL:
             _sqls = []
             for index in self.indexes:
                 _sqls.append(
-                    f"CREATE {'UNIQUE ' if index.unique else ' '}INDEX {type.quote(index.name)} on {type.quote(self.name)} ({', '.join(f'{type.quote(f.name)}' for f in index.fields)});"
+                    f"CREATE {'UNIQUE ' if index.unique else ' '}INDEX {type.quote(index.name)} on {table} ({', '.join(f'{type.quote(f.name)}' for f in index.fields)});"
                 )
             sql += "\n".join(_sqls)
         if type == type.POSTGRES:
@@ -458,28 +519,7 @@ class Schema:
 
     @classmethod
     def detect_field_type(cls, _: Database, field_type: str) -> typing.Type[Field]:
-        if utils.contains(field_type, ("json",)):
-            return JsonField
-        elif utils.contains(field_type, ("int", "serial")):
-            return IntField
-        elif utils.contains(field_type, ("boolean",)):
-            return BoolField
-        elif utils.contains(field_type, ("float", "real", "double")):
-            return FloatField
-        elif utils.contains(field_type, ("numeric", "decimal", "money")):  # TODO: money
-            return DecimalField
-        elif utils.contains(field_type, ("binary", "blob", "bytea", "bit")):
-            return BytesField
-        elif utils.contains(field_type, ("date",)):
-            return DateField
-        elif utils.contains(field_type, ("time",)):
-            return TimeField
-        elif utils.contains(field_type, ("datetime", "timestamp")):
-            return DateTimeField
-        elif utils.contains(field_type, ("char", "text", "character", "clob")):
-            return CharField
-        else:
-            return Field
+        return field_type_class(field_type.lower())
 
 
 @dataclasses.dataclass
@@ -525,30 +565,26 @@ class Migration:
                 sqls.append(
                     f"ALTER TABLE {type.quote(self.old_schema.name)} RENAME {type.quote(self.schema.name)}"
                 )
+            table = type.quote(self.schema.name)
+            dropped_fields = frozenset(f.name for f in self.drop_fields)
             for i in self.drop_indexes:
                 if type == type.MYSQL:
-                    if not set(f.name for f in i.fields) & set(
-                        f.name for f in self.drop_fields
-                    ):
+                    if dropped_fields.isdisjoint(f.name for f in i.fields):
                         sqls.append(
-                            f"ALTER TABLE {type.quote(self.schema.name)} DROP INDEX {type.quote(i.name)}"
+                            f"ALTER TABLE {table} DROP INDEX {type.quote(i.name)}"
                         )
                 else:
                     sqls.append(f"DROP INDEX {type.quote(i.name)}")
             for f in self.add_fields:
-                sqls.append(
-                    f"ALTER TABLE {type.quote(self.schema.name)} ADD COLUMN {f.to_sql(type=type)}"
-                )
+                sqls.append(f"ALTER TABLE {table} ADD COLUMN {f.to_sql(type=type)}")
                 if not isinstance(f.default_value, f.NoDefault):
                     sqls[-1] += f" DEFAULT {V(f.to_database(f.default_value))}"
                     if type != Database.Type.SQLITE:
                         sqls.append(
-                            f"ALTER TABLE {type.quote(self.schema.name)} ALTER COLUMN {type.quote(f.name)} DROP DEFAULT"
+                            f"ALTER TABLE {table} ALTER COLUMN {type.quote(f.name)} DROP DEFAULT"
                         )
             for f in self.drop_fields:
-                sqls.append(
-                    f"ALTER TABLE {type.quote(self.schema.name)} DROP COLUMN {type.quote(f.name)}"
-                )
+                sqls.append(f"ALTER TABLE {table} DROP COLUMN {type.quote(f.name)}")
             for f in self.change_type_fields:
                 if type == type.SQLITE:
                     raise exception.OperationException(
@@ -556,15 +592,15 @@ class Migration:
                     )
                 elif type == type.MYSQL:
                     sqls.append(
-                        f"ALTER TABLE {type.quote(self.schema.name)} MODIFY {type.quote(f.name)} {f.type}"
+                        f"ALTER TABLE {table} MODIFY {type.quote(f.name)} {f.type}"
                     )
                 else:
                     sqls.append(
-                        f"ALTER TABLE {type.quote(self.schema.name)} ALTER COLUMN {type.quote(f.name)} TYPE {f.type}"
+                        f"ALTER TABLE {table} ALTER COLUMN {type.quote(f.name)} TYPE {f.type}"
                     )
             for i in self.add_indexes:
                 sqls.append(
-                    f"CREATE {'UNIQUE ' if i.unique else ''}INDEX {type.quote(i.name)} on {type.quote(self.schema.name)} ({','.join(type.quote(f.name) for f in i.fields)})"
+                    f"CREATE {'UNIQUE ' if i.unique else ''}INDEX {type.quote(i.name)} on {table} ({','.join(type.quote(f.name) for f in i.fields)})"
                 )
         if sqls:
             sqls[-1] += ";"
@@ -583,21 +619,15 @@ class Operation(enum.IntEnum):
 # query builder
 @dataclasses.dataclass
 class SQLMarker:
-    class ID:
-        def __init__(self, value: int = 0) -> None:
-            self.value: int = value
-
-        def get_add(self) -> int:
-            v = self.value
-            self.value += 1
-            return v
+    # shared bind var counter, C-level increment
+    ID = itertools.count
 
     field: typing.Optional[Field] = None
-    _var_index: ID = dataclasses.field(default_factory=ID)
+    _var_index: typing.Iterator[int] = dataclasses.field(default_factory=ID)
     _vars: typing.Dict[str, typing.Any] = dataclasses.field(default_factory=dict)
 
     def mark(self, value: typing.Any) -> str:
-        k = f"var{self._var_index.get_add()}"
+        k = f"var{next(self._var_index)}"
         self._vars[k] = value
         return k
 
@@ -775,7 +805,7 @@ class Crud(BaseSQLBuilder):
         is_and=True,
     ) -> CRUD_TV:
         if conditions:
-            _where = reduce(lambda c1, c2: c1 & c2 if is_and else c1 | c2, conditions)
+            _where = reduce(operator.and_ if is_and else operator.or_, conditions)
             if self._where:
                 self._where = self._where & _where
             else:
@@ -839,22 +869,42 @@ class Crud(BaseSQLBuilder):
         type: Database.Type = Database.Type.MYSQL,
         fields: typing.Iterable[Field] = tuple(),
         ignore_fields: typing.Iterable[Field] = tuple(),
+        with_total: bool = False,
     ) -> str:
+        """with_total: add the total rows count ignoring limit as the last column"""
         assert self.schema
 
         self._selected_fields.extend(fields)
-        if not count:
-            _ignore_fields = {f.name for f in ignore_fields}
-            sql = f"SELECT {', '.join(f'{type.quote(f.name)}' for f in self._selected_fields or self.schema.fields if f.name not in _ignore_fields)} FROM {type.quote(self.schema.name)}"
-        else:
-            sql = f"SELECT COUNT(*) FROM {type.quote(self.schema.name)}"
+        _ignore_fields = {f.name for f in ignore_fields}
+        key = (
+            "select",
+            type,
+            count,
+            tuple(f.name for f in self._selected_fields),
+            tuple(sorted(_ignore_fields)),
+            with_total,
+        )
+        sql = self.schema._sql_cache.get(key, "")
+        if not sql:
+            if not count:
+                sql = f"SELECT {', '.join(f'{type.quote(f.name)}' for f in self._selected_fields or self.schema.fields if f.name not in _ignore_fields)}"
+                if with_total:
+                    sql += f", COUNT(*) OVER () AS {type.quote('_total')}"
+                sql += f" FROM {type.quote(self.schema.name)}"
+            else:
+                sql = f"SELECT COUNT(*) FROM {type.quote(self.schema.name)}"
+            self.schema._sql_cache[key] = sql
         if type == type.MYSQL:
-            for indexes in self._use_indexes:
-                sql += f" USE INDEX {type.quote(indexes[1]) if indexes[1] else ''} ({','.join(type.quote(s) for s in indexes[0])}) "
-            for indexes in self._ignore_indexes:
-                sql += f" IGNORE INDEX {type.quote(indexes[1]) if indexes[1] else ''} ({','.join(type.quote(s) for s in indexes[0])}) "
-            for indexes in self._force_indexes:
-                sql += f" FORCE INDEX {indexes[1] if indexes[1] else ''} ({','.join(type.quote(s) for s in indexes[0])}) "
+            hints = [
+                f" {keyword} INDEX {(type.quote(_for) if quote_for else _for) if _for else ''} ({','.join(type.quote(s) for s in names)}) "
+                for keyword, quote_for, indexes in (
+                    ("USE", True, self._use_indexes),
+                    ("IGNORE", True, self._ignore_indexes),
+                    ("FORCE", False, self._force_indexes),
+                )
+                for names, _for in indexes
+            ]
+            sql += "".join(hints)
         elif type == type.SQLITE:
             _use_indexes = self._use_indexes or self._force_indexes
             if _use_indexes:
@@ -874,8 +924,8 @@ class Crud(BaseSQLBuilder):
             if self._order_by:
                 _order_by_sql = ", ".join(
                     [
-                        f"{type.quote(od.name) if isinstance(od, Field) else od.sync(self).to_sql(type=type)} {'ASC' if self._order_by_asc[i] else 'DESC'}"
-                        for i, od in enumerate(self._order_by)
+                        f"{type.quote(od.name) if isinstance(od, Field) else od.sync(self).to_sql(type=type)} {'ASC' if asc else 'DESC'}"
+                        for od, asc in zip(self._order_by, self._order_by_asc)
                     ]
                 )
 
@@ -912,6 +962,23 @@ class Crud(BaseSQLBuilder):
             sql += f" WHERE {self._where.sync(self).to_sql(type=type)}"
         return sql + ";"
 
+    def to_primary_delete_sql(
+        self, primary: typing.Any, type: Database.Type = Database.Type.MYSQL
+    ) -> str:
+        """DELETE by primary key"""
+        assert self.schema and self.schema.primary_field
+
+        primary_mark = self.mark(self.schema.primary_field.to_database(primary))
+        key = ("delete", type)
+        sql = self.schema._sql_cache.get(key, "")
+        if not sql:
+            sql = (
+                f"DELETE from {type.quote(self.schema.name)} "
+                f"WHERE {type.quote(self.schema.primary_field.name)} = :{primary_mark};"
+            )
+            self.schema._sql_cache[key] = sql
+        return sql
+
     def to_update_sql(
         self,
         data: typing.Dict[str, typing.Any],
@@ -933,6 +1000,29 @@ class Crud(BaseSQLBuilder):
             sql += f" WHERE {self._where.sync(self).to_sql(type=type)}"
         return sql + ";"
 
+    def to_primary_update_sql(
+        self,
+        data: typing.Dict[str, typing.Any],
+        primary: typing.Any,
+        type: Database.Type = Database.Type.MYSQL,
+    ) -> str:
+        """UPDATE by primary key, data should not contain SQLMarker values"""
+        assert self.schema and self.schema.primary_field
+
+        fields = {f.name: f for f in self.schema.fields}
+        marks = [self.mark(fields[k].to_database(v)) for k, v in data.items()]
+        primary_mark = self.mark(self.schema.primary_field.to_database(primary))
+        key = ("update", type, tuple(data.keys()))
+        sql = self.schema._sql_cache.get(key, "")
+        if not sql:
+            sql = (
+                f"UPDATE {type.quote(self.schema.name)} SET "
+                f"{', '.join(f'{type.quote(k)} = :{m}' for k, m in zip(data, marks))} "
+                f"WHERE {type.quote(self.schema.primary_field.name)} = :{primary_mark};"
+            )
+            self.schema._sql_cache[key] = sql
+        return sql
+
 
 @dataclasses.dataclass
 class Insert(BaseSQLBuilder):
@@ -949,53 +1039,71 @@ class Insert(BaseSQLBuilder):
 
         fields = {f.name: f for f in self.schema.fields}
 
-        keys = list(self.insert_data[0].keys())
+        keys = tuple(self.insert_data[0].keys())
         vars = []
         for d in self.insert_data:
             _vars = []
             for k in keys:
                 _vars.append(self.mark(fields[k].to_database(d[k])))
             vars.append(_vars)
-        sql = f"INSERT INTO {type.quote(self.schema.name)} ({', '.join(map(lambda x: f'{type.quote(x)}', keys))}) VALUES"
-        insert_value_sql = []
-        for vs in vars:
-            insert_value_sql.append(f"({', '.join(':' + v for v in vs)})")
-        sql = sql + ", ".join(insert_value_sql)
+        head, tail = self._to_sql_parts(keys, type=type)
+        return (
+            head
+            + ", ".join(f"({', '.join(':' + v for v in vs)})" for vs in vars)
+            + tail
+        )
+
+    def _to_sql_parts(
+        self, keys: typing.Tuple[str, ...], type: Database.Type = Database.Type.MYSQL
+    ) -> typing.Tuple[str, str]:
+        """SQL before and after VALUES rows, cached per schema"""
+        assert self.schema
+
+        update_fields = tuple(self.update_fields)
+        conflict_targets = tuple(self.conflict_targets)
+        head_key = ("insert", type, keys)
+        tail_key = ("insert_tail", type, update_fields, conflict_targets)
+        head = self.schema._sql_cache.get(head_key, "")
+        if not head:
+            head = f"INSERT INTO {type.quote(self.schema.name)} ({', '.join(map(lambda x: f'{type.quote(x)}', keys))}) VALUES"
+            self.schema._sql_cache[head_key] = head
+        if tail_key in self.schema._sql_cache:
+            return head, self.schema._sql_cache[tail_key]
+
+        sql = ""
         # upsert
-        if self.update_fields:
+        if update_fields:
             update_value_sql = []
             _sql = ""
             if type == type.MYSQL:
-                if self.conflict_targets:
+                if conflict_targets:
                     raise exception.OperationException(
                         "For MySQL - conflict_target not support"
                     )
                 _sql = " ON DUPLICATE KEY UPDATE "
-                for k in self.update_fields:
+                for k in update_fields:
                     update_value_sql.append(f"{k} = VALUES({k})")
             elif type == type.SQLITE:
                 conflict_target = (
-                    f"({','.join(self.conflict_targets)})"
-                    if self.conflict_targets
-                    else ""
+                    f"({','.join(conflict_targets)})" if conflict_targets else ""
                 )
                 _sql = f" ON CONFLICT{conflict_target} DO UPDATE SET "
-                for k in self.update_fields:
+                for k in update_fields:
                     update_value_sql.append(f"{k} = excluded.{k}")
             else:
-                if not self.conflict_targets:
+                if not conflict_targets:
                     raise exception.OperationException(
                         "For PostgresSQL - conflict_target must be provided"
                     )
-                _sql = (
-                    f" ON CONFLICT ({','.join(self.conflict_targets)}) DO UPDATE SET "
-                )
-                for k in self.update_fields:
+                _sql = f" ON CONFLICT ({','.join(conflict_targets)}) DO UPDATE SET "
+                for k in update_fields:
                     update_value_sql.append(f"{k} = EXCLUDED.{k}")
             sql += _sql + ", ".join(update_value_sql)
         if type == type.POSTGRES:
             sql += f" RETURNING {self.schema.primary_field.name}"
-        return sql + ";"
+        tail = sql + ";"
+        self.schema._sql_cache[tail_key] = tail
+        return head, tail
 
 
 @dataclasses.dataclass
@@ -1009,27 +1117,34 @@ class CaseUpdate(BaseSQLBuilder):
         assert self.schema
 
         fields = {f.name: f for f in self.schema.fields}
-
-        parse_data: typing.DefaultDict[str, typing.Dict[str, typing.Any]] = defaultdict(
-            dict
-        )
-        primary_values = []
-        for d in self.data:
+        primary = self.schema.primary_field
+        quoted_primary = type.quote(primary.name)
+
+        rows = {d[primary.name]: d for d in self.data}  # the last one wins
+        primary_marks = []
+        # field name -> [(primary key mark, value mark)]
+        parse_data: typing.DefaultDict[str, typing.List] = defaultdict(list)
+        for pv, d in rows.items():
+            # every primary key is bound once and shared by all cases
+            primary_mark = self.mark(primary.to_database(pv))
+            primary_marks.append(primary_mark)
             for k, v in d.items():
-                if k == self.schema.primary_field.name:
-                    primary_values.append(v)
-                else:
-                    parse_data[k][d[self.schema.primary_field.name]] = fields[
-                        k
-                    ].to_database(v)
+                if k != primary.name:
+                    parse_data[k].append(
+                        (primary_mark, self.mark(fields[k].to_database(v)))
+                    )
         sql = f"UPDATE {type.quote(self.schema.name)} SET"
         _sqls = []
-        for k, vs in parse_data.items():
-            case = SQLCase(cast_type=fields[k].type)
-            for pv, v in vs.items():
-                case.case(self.schema.primary_field == pv, v)
-            _sqls.append(f" {type.quote(k)} = {case.sync(self).to_sql(type=type)}")
+        for k, marks in parse_data.items():
+            cast_type = r"\:\:" + fields[k].type if type == type.POSTGRES else ""
+            whens = " ".join(
+                f"WHEN {quoted_primary} = :{pm} THEN :{vm}{cast_type}"
+                for pm, vm in marks
+            )
+            _sqls.append(
+                f" {type.quote(k)} = CASE {whens} ELSE {type.quote(k)}{cast_type} END"
+            )
         sql += ", ".join(_sqls)
-        sql += f" WHERE {(self.schema.primary_field.contains(primary_values)).sync(self).to_sql(type=type)};"
+        sql += f" WHERE {quoted_primary} IN ({', '.join(':' + pm for pm in primary_marks)});"
 
         return sql
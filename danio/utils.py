@@ -1,7 +1,5 @@
-import inspect
 import typing
 from importlib import import_module
-from pkgutil import iter_modules
 
 TV = typing.TypeVar("TV")
 
@@ -28,6 +26,8 @@ def find_classes(
     cls: typing.Type[TV], paths: typing.List[str]
 ) -> typing.Set[typing.Type[TV]]:
     """Parse all orm table by package path"""
+    from pkgutil import walk_packages  # only needed by migration tooling
+
     modules = []
     models: typing.Set[typing.Type[TV]] = set()
     # get all modules from packages and subpackages
@@ -35,24 +35,34 @@ def find_classes(
         module: typing.Any = import_module(path)
         modules.append(module)
         if hasattr(module, "__path__"):
-            package_paths = []
-            for _, name, ispkg in iter_modules(module.__path__):
-                next_path = path + "." + name
-                if ispkg:
-                    package_paths.append(next_path)
-                else:
-                    modules.append(import_module(next_path))
-            if len(package_paths) > 0:
-                models.union(find_classes(cls, package_paths))
-    # get and sift ant class obj from modules
-    for module in modules:
-        for name, obj in inspect.getmembers(module):
-            if isinstance(obj, type) and issubclass(obj, cls) and obj not in models:
+            for _, name, _ in walk_packages(module.__path__, prefix=f"{path}."):
+                modules.append(import_module(name))
+    # walk the subclass tree once instead of every module member, a class counts
+    # when any scanned module holds it, including imports and re-exports
+    members = {id(v) for m in modules for v in vars(m).values()}
+    subclasses = [cls]
+    seen = set(subclasses)
+    if id(cls) in members:
+        models.add(cls)
+    while subclasses:
+        for obj in subclasses.pop().__subclasses__():
+            if obj in seen:
+                continue
+            seen.add(obj)
+            subclasses.append(obj)
+            if id(obj) in members:
                 models.add(obj)
 
     return models
 
 
+def batched(
+    items: typing.Sequence[TV], size: int
+) -> typing.Iterator[typing.Sequence[TV]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
 def contains(source: str, subs: typing.Iterable[str], case_ignore: bool = True) -> bool:
     if case_ignore:
         source = source.lower()
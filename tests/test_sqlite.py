@@ -1,5 +1,6 @@
 import enum
 import glob
+import json
 import os
 import typing
 
@@ -100,12 +101,36 @@ async def test_sql():
     assert await User.where(User.id == -1).fetch_count() == 0
     # row data
     assert await User.where().fetch_row()
+    # with count
+    total = await User.where(User.id > 0).fetch_count()
+    users, count = await User.where(User.id > 0).limit(1).fetch_all_with_count()
+    assert len(users) == 1 and count == total
+    users, count = (
+        await User.where(User.id > 0).limit(1).offset(10000).fetch_all_with_count()
+    )
+    assert not users and count == total
+    rows = [r._mapping for r in await User.where().fetch_row()]
+    assert [u.id for u in User.load(rows)] == [r["id"] for r in rows]
     # update
     u = await User.where(User.id == u.id).fetch_one()
     u.name = "updated"
     await u.save()
     u = await User.where(User.id == u.id).fetch_one()
     assert u.name == "updated"
+    u.name = "updated again"
+    u.age = 99
+    await u.save(fields=[User.name])
+    u = await User.where(User.id == u.id).fetch_one()
+    assert u.name == "updated again"
+    assert u.age != 99
+    # refetch
+    u.name = "stale"
+    u.age = 99
+    await u.refetch(fields=(User.name,))
+    assert u.name == "updated again"
+    assert u.age == 99
+    await u.refetch()
+    assert u.age != 99
     # delete
     await User.where().delete()
     assert not await User.where().fetch_count()
@@ -138,6 +163,25 @@ async def test_sql():
     assert (await User.where(User.id == 100).fetch_one()).name == "updated"
 
 
+@pytest.mark.asyncio
+async def test_database_router():
+    read_db = danio.Database("sqlite://./tests/test.db")
+    router = danio.DatabaseRouter(db, {danio.Operation.READ: read_db})
+    assert router.databases == [db, read_db]
+    token = danio.Model.DATABASE.set(router)
+    try:
+        await read_db.connect()
+        assert User.get_database(danio.Operation.READ) is read_db
+        assert User.get_database(danio.Operation.CREATE) is db
+        u = await User(name="routed").save()
+        assert (await User.where(User.id == u.id).fetch_one()).name == "routed"
+        router.routes[danio.Operation.DELETE] = read_db
+        assert User.get_database(danio.Operation.DELETE) is read_db
+    finally:
+        await read_db.disconnect()
+        danio.Model.DATABASE.reset(token)
+
+
 @pytest.mark.asyncio
 async def test_complicated_update():
     # +1
@@ -191,7 +235,7 @@ async def test_complicated_update():
 
 
 @pytest.mark.asyncio
-async def test_bulk_operations():
+async def test_bulk_operations(monkeypatch):
     # create
     users = await User.bulk_create([User(name=f"user_{i}") for i in range(10)])
     for i, u in enumerate(users):
@@ -200,6 +244,11 @@ async def test_bulk_operations():
     users = await User.bulk_create([User(name=f"user_{i}") for i in range(10)])
     for i, u in enumerate(users):
         assert u.id == i + 1 + 10
+    # validate
+    with pytest.raises(danio.ValidateException):
+        await User.bulk_create([User(name="invalid", gender=3)])
+    with pytest.raises(danio.ValidateException):
+        await User.bulk_update([User(id=1, name="invalid", gender=3)])
     # with special id
     users = [User(name=f"user_100_{i}") for i in range(10)]
     users[1].id = 34
@@ -226,9 +275,86 @@ async def test_bulk_operations():
     for user in await User.where().fetch_all():
         assert user.name.endswith(f"_updated_{user.id}")
         assert user.gender == User.gender.default
+    # batch size
+    assert User._batch_size(db, 1) == User._bulk_batch_size
+    assert User._batch_size(db, db.type.max_bind_params) == 1
     # delete
-    await User.bulk_delete(users)
+    monkeypatch.setattr(User, "_bulk_batch_size", 3)
+    assert await User.bulk_delete(users) == len(users)
     assert not await User.where().fetch_all()
+    assert not await User.bulk_delete([])
+    # in batches
+    users = await User.bulk_create([User(name=f"user_{i}") for i in range(10)])
+    assert len({u.id for u in users}) == 10
+    for user in users:
+        user.age = user.id
+    await User.bulk_update(users, fields=(User.age,))
+    for user in await User.where().fetch_all():
+        assert user.age == user.id
+        assert user.name == f"user_{users.index(user)}"
+    # from generator
+    users = await User.bulk_create(User(name=f"gen_{i}") for i in range(5))
+    assert all(u.id for u in users)
+    assert await User.bulk_delete(u for u in users) == 5
+
+
+@pytest.mark.asyncio
+async def test_signals():
+    @danio.model
+    class SignalUser(User):
+        signals: typing.ClassVar[typing.List[str]] = []
+
+        async def before_save(self):
+            self.signals.append("before_save")
+
+        async def after_create(self):
+            await super().after_create()
+            self.signals.append("after_create")
+
+        async def after_delete(self):
+            self.signals.append("after_delete")
+
+    assert not User._signals
+    assert SignalUser._signals
+    async with db.connection() as connection:
+        async with connection._connection._connection.cursor() as cursor:
+            await cursor.executescript(SignalUser.schema.to_sql(type=db.type))
+    u = await SignalUser(name="signal").save()
+    assert SignalUser.signals == ["before_save", "after_create"]
+    u.name = "updated"
+    await u.save()
+    assert SignalUser.signals == ["before_save", "after_create", "before_save"]
+    SignalUser.signals.clear()
+    users = await SignalUser.bulk_create([SignalUser(name=f"s_{i}") for i in range(3)])
+    assert SignalUser.signals == ["before_save"] * 3 + ["after_create"] * 3
+    SignalUser.signals.clear()
+    await SignalUser.bulk_delete(users)
+    assert await u.delete()
+    assert SignalUser.signals == ["after_delete"] * 4
+    with pytest.raises(danio.ValidateException):
+        await SignalUser(name="invalid", gender=3).save()
+
+    # only exact members pass, even for flags or enums with `_missing_`
+    class Flag(enum.IntFlag):
+        READ = 1
+        WRITE = 2
+
+    class Color(enum.Enum):
+        RED = 0
+
+        @classmethod
+        def _missing_(cls, value):
+            return cls.RED
+
+    @danio.model
+    class ChoiceUser(danio.Model):
+        flag: typing.Annotated[Flag, danio.IntField(enum=Flag)] = Flag.READ
+        color: typing.Annotated[Color, danio.IntField(enum=Color)] = Color.RED
+
+    await ChoiceUser().validate()
+    for invalid in (dict(flag=3), dict(flag=8), dict(color=5)):
+        with pytest.raises(danio.ValidateException):
+            await ChoiceUser(**invalid).validate()
 
 
 @pytest.mark.asyncio
@@ -317,12 +443,22 @@ async def test_schema():
             ("level",),
         )
 
+    assert [i.name for i in UserProfile.get_schema().indexes] == [
+        i.name for i in UserProfile.schema.indexes
+    ]
     m = UserProfile.get_schema() - UserProfile.schema
     assert not m.add_fields
     assert not m.drop_fields
     assert not m.change_type_fields
     assert not m.add_indexes
     assert not m.drop_indexes
+    assert UserProfile.schema == UserProfile.schema
+    assert UserProfile.get_schema() == UserProfile.schema
+    index_fields = [UserProfile.level]
+    assert (
+        danio.schema.Index(fields=index_fields, unique=False).name
+        != danio.schema.Index(fields=index_fields, unique=False).name
+    )
     async with db.connection() as connection:
         async with connection._connection._connection.cursor() as cursor:
             await cursor.executescript(UserProfile.schema.to_sql(type=db.type))
@@ -330,6 +466,49 @@ async def test_schema():
     assert (
         len(await db.fetch_all(f"PRAGMA INDEX_LIST('{UserProfile.table_name}');")) == 3
     )
+    # by `danio.field`
+
+    @danio.model
+    class Pet(danio.Model):
+        name: str = danio.field(danio.CharField, comment="pet name")
+        age: int = danio.field(danio.IntField, default=1)
+
+    assert [f.name for f in Pet.schema.fields] == ["id", "name", "age"]
+    assert Pet.name.comment == "pet name"
+    assert Pet().age == 1
+    # json
+    json_field = danio.JsonField()
+    for value in ({"a": [1, "二"]}, {1: 2**70}, [float("nan"), float("inf")]):
+        assert json_field.to_database(value) == json.dumps(value)
+    for value in ({"a": [1, "二"]}, {1: 2**70}):
+        assert json_field.to_python(json_field.to_database(value)) == json.loads(
+            json.dumps(value)
+        )
+    # field type detection
+    for field_type, field_cls in (
+        ("BIGINT", danio.IntField),
+        ("DATETIME", danio.DateTimeField),
+        ("timestamp with time zone", danio.DateTimeField),
+        ("date", danio.DateField),
+        ("time", danio.TimeField),
+        ("varchar(255)", danio.CharField),
+    ):
+        assert danio.Schema.detect_field_type(db, field_type) is field_cls
+
+
+@pytest.mark.asyncio
+async def test_get_models(tmp_path, monkeypatch):
+    (tmp_path / "danio_other_models.py").write_text(
+        "import danio\n\n\n@danio.model\nclass Bird(danio.Model):\n    pass\n"
+    )
+    (tmp_path / "danio_app_models.py").write_text(
+        "from danio_other_models import Bird  # noqa\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # re-exported from an unscanned module
+    assert [m.__name__ for m in danio.manage.get_models(["danio_app_models"])] == [
+        "Bird"
+    ]
 
 
 @pytest.mark.asyncio